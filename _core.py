@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import re
+import subprocess
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional, Any, Dict, Iterable, List, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+
+# Modelo y utilidades compartidas por main.py y v2.py.
+# slots=True: sin __dict__ por instancia, importa cuando se acumulan miles de cabeceras.
+@dataclass(slots=True)
+class ConvaHeader:
+    titulo_pdf: Optional[str] = None
+    apellidos_nombres: Optional[str] = None
+    codigo: Optional[str] = None
+    institucion_procedencia: Optional[str] = None
+    carrera_procedencia: Optional[str] = None
+    carrera_upn: Optional[str] = None
+    modalidad: Optional[str] = None
+    campus: Optional[str] = None
+    plan_estudios: Optional[str] = None
+    fecha: Optional[str] = None
+    version_excelconva: Optional[str] = None
+    total_creditos: Optional[str] = None
+    observaciones: Optional[str] = None
+    nombre_pdf: Optional[str] = None
+    ruta_pdf: Optional[str] = None
+
+
+# Sin TEXT_PRESERVE_LIGATURES ni TEXT_PRESERVE_WHITESPACE: las ligaduras ("ﬁ")
+# salen como letras sueltas y los espacios raros como " ", que es lo que esperan los regex.
+FLAGS_TEXTO = fitz.TEXT_MEDIABOX_CLIP
+
+
+def _compile_patterns(patterns: List[str], flags=re.IGNORECASE) -> List[re.Pattern]:
+    return [re.compile(p, flags) for p in patterns]
+
+
+# Corta el nombre en la primera marca que aparezca. " Código" también corta
+# sin los dos puntos (como en v2); "Codigo" solo con ellos.
+PATRON_CORTE_NOMBRE = re.compile(r"\s+(?:ID\s*Estudiante:|Código|Codigo:)", re.IGNORECASE)
+
+
+def _limpiar_nombre(nombre_raw: Optional[str]) -> Optional[str]:
+    if not nombre_raw:
+        return None
+    m = PATRON_CORTE_NOMBRE.search(nombre_raw)
+    end = m.start() if m else len(nombre_raw)
+    return " ".join(nombre_raw[:end].split())
+
+
+def _verificar_pdf(pdf_path: str) -> None:
+    """
+    Descarta archivos que no son PDF antes de abrirlos con PyMuPDF.
+    La firma "%PDF-" puede no estar en el byte 0: se busca en el primer KiB.
+    """
+    with open(pdf_path, "rb") as f:
+        head = f.read(1024)
+    if b"%PDF-" not in head:
+        raise ValueError("No es un PDF válido")
+
+
+def write_excel(excel_path: str, columns: List[str], rows: Iterable[Sequence[Any]]) -> None:
+    # xlsxwriter en modo constant_memory escribe fila por fila a disco;
+    # se importa aquí para no cargarlo en el arranque ni en los procesos del pool
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(excel_path, {"constant_memory": True})
+    try:
+        ws = wb.add_worksheet()
+        header_fmt = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        ws.write_row(0, 0, columns, header_fmt)
+        for i, values in enumerate(rows, start=1):
+            ws.write_row(i, 0, values)
+    finally:
+        wb.close()
+
+
+# Caché de cabeceras por (ruta, mtime_ns, tamaño, max_pages): si el PDF no cambió
+# no se vuelve a abrir. Cada app la guarda en su propio archivo JSON al terminar
+# cada lote y al cerrar.
+HEADER_CACHE_MAX = 4096
+HEADER_CACHE_VERSION = 3
+CacheKey = Tuple[str, int, int, int]
+_header_cache: Dict[CacheKey, ConvaHeader] = {}
+
+
+def _header_cache_key(pdf_path: str, max_pages: int) -> CacheKey:
+    st = os.stat(pdf_path)
+    return (pdf_path, st.st_mtime_ns, st.st_size, max_pages)
+
+
+def _header_cache_put(key: CacheKey, h: ConvaHeader) -> None:
+    if len(_header_cache) >= HEADER_CACHE_MAX:
+        _header_cache.pop(next(iter(_header_cache)))
+    _header_cache[key] = h
+
+
+def load_header_cache(path: str) -> None:
+    if not os.path.exists(path):
+        return
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != HEADER_CACHE_VERSION:
+            return
+        entries = {tuple(key): ConvaHeader(**campos) for key, campos in data["entries"]}
+    except (OSError, ValueError, TypeError, KeyError, AttributeError) as ex:
+        logger.warning("No se pudo leer la caché de cabeceras %s: %s", path, ex)
+        return
+    _header_cache.update(entries)
+
+
+def save_header_cache(path: str) -> None:
+    data = {
+        "version": HEADER_CACHE_VERSION,
+        "entries": [[list(key), asdict(h)] for key, h in _header_cache.items()],
+    }
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except OSError as ex:
+        logger.warning("No se pudo guardar la caché de cabeceras %s: %s", path, ex)
+
+
+_IS_WINDOWS = os.name == "nt"
+_IS_MAC = not _IS_WINDOWS and hasattr(os, "uname") and os.uname().sysname == "Darwin"
+
+# En Windows ProcessPoolExecutor no admite más de 61 procesos.
+MAX_WORKERS_WINDOWS = 61
+
+
+def _get_max_workers(n_files: int) -> int:
+    # deja un núcleo libre para la interfaz
+    n = min(n_files, max(1, (os.cpu_count() or 2) - 1))
+    if _IS_WINDOWS:
+        n = min(n, MAX_WORKERS_WINDOWS)
+    return n
+
+
+def _make_pool(n_files: int) -> Executor:
+    """
+    Pool de procesos para extraer PDFs en paralelo. Si la plataforma no permite
+    crear procesos, se usa un único hilo: PyMuPDF no es seguro entre hilos.
+    """
+    try:
+        return ProcessPoolExecutor(max_workers=_get_max_workers(n_files))
+    except (NotImplementedError, ImportError, OSError):
+        return ThreadPoolExecutor(max_workers=1)
+
+
+def abrir_archivo(path: str):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No existe: {path}")
+    if _IS_WINDOWS:
+        os.startfile(path)  # type: ignore
+    elif _IS_MAC:
+        subprocess.Popen(["open", path])
+    else:
+        subprocess.Popen(["xdg-open", path])
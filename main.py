@@ -1,36 +1,39 @@
+import atexit
+import multiprocessing
 import os
 import re
-import subprocess
 import threading
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any, List
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from operator import attrgetter
+from pathlib import Path
+from typing import Optional, Any, Dict, List
 
+import fitz  # PyMuPDF
 import flet as ft
-import pdfplumber
-import pandas as pd
 
-# ✅ Tkinter (selector nativo Windows)
-from tkinter import Tk, filedialog
-
-
-@dataclass
-class ConvaHeader:
-    titulo_pdf: Optional[str] = None  # ✅ NUEVO: primer encabezado
-    apellidos_nombres: Optional[str] = None
-    codigo: Optional[str] = None
-    carrera_upn: Optional[str] = None
-    campus: Optional[str] = None
-    plan_estudios: Optional[str] = None
-    fecha: Optional[str] = None
-    version_excelconva: Optional[str] = None
-    total_creditos: Optional[str] = None
-    observaciones: Optional[str] = None
-    nombre_pdf: Optional[str] = None
-    ruta_pdf: Optional[str] = None
+from _core import (
+    FLAGS_TEXTO,
+    ConvaHeader,
+    _header_cache,
+    _header_cache_key,
+    _header_cache_put,
+    _limpiar_nombre,
+    _make_pool,
+    _verificar_pdf,
+    abrir_archivo,
+    load_header_cache,
+    save_header_cache,
+    write_excel,
+)
+
+BASE_DIR = Path(__file__).resolve().parent
+EXCEL_PATH = BASE_DIR / "resultado_conva.xlsx"
+CACHE_PATH = BASE_DIR / ".conva_cache.json"
 
 
 def _clean_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
+    return " ".join(s.split())
 
 
 def _extraer_titulo_pdf(text: str) -> Optional[str]:
@@ -84,187 +87,140 @@ def _extraer_titulo_pdf(text: str) -> Optional[str]:
     return lines[0]
 
 
-def _limpiar_nombre(nombre_raw: Optional[str]) -> Optional[str]:
-    if not nombre_raw:
-        return None
-    cortes = [" ID Estudiante:", " Código:", " CODIGO:", " ID ESTUDIANTE:"]
-    nombre = nombre_raw
-    low = nombre.lower()
-    for c in cortes:
-        idx = low.find(c.lower())
-        if idx != -1:
-            nombre = nombre[:idx]
-            break
-    return _clean_spaces(nombre)
-
-
-def _extraer_observacion_paquete(text: str) -> Optional[str]:
-    m = re.search(r"(Convalidación\s+por\s+paquete\s*\([^\)]+\))", text, re.IGNORECASE)
-    if m:
-        return _clean_spaces(m.group(1))
-    m2 = re.search(r"(Convalidación\s+por\s+paquete)", text, re.IGNORECASE)
-    if m2:
-        return _clean_spaces(m2.group(1))
-    return None
-
-
-def _compile_patterns(patterns: List[str], flags=re.IGNORECASE) -> List[re.Pattern]:
-    return [re.compile(p, flags) for p in patterns]
-
-
-def _extract_first_compiled(patterns: List[re.Pattern], text: str) -> Optional[str]:
-    for pat in patterns:
-        m = pat.search(text)
-        if m:
-            val = m.group(1)
-            if val is not None:
-                return _clean_spaces(val)
-    return None
-
-
-PATRONES_NOMBRE = _compile_patterns([r"Apellidos\s+y\s+Nombres:\s*([^\n]+)"])
-PATRONES_CODIGO = _compile_patterns([r"\bID\s*Estudiante:\s*(N\d+)", r"\bCódigo:\s*(N\d+)"])
-PATRONES_CARRERA = _compile_patterns([r"Carrera\s+en\s+UPN:\s*([^\n]+)", r"Carrera\s+UPN:\s*([^\n]+)"])
-PATRONES_CAMPUS = _compile_patterns([r"Campus:\s*([^\n]+)"])
-PATRONES_PLAN = _compile_patterns([r"Plan\s+de\s+Estudios:\s*([A-Za-z0-9.\-]+)"])
-PATRONES_FECHA = _compile_patterns([r"\bFecha:\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{4})"])
-PATRONES_VERSION = _compile_patterns([
-    r"Versión\s+ExcelConva:\s*([0-9.]+)",
-    r"Versión\s+Conva2025G\s*:\s*([0-9.]+)",
-    r"Versión\s+Conva\s*:\s*([^\n]+)",
-])
-PATRONES_TOTAL = _compile_patterns([
-    r"TOTAL\s+DE\s+CRÉDITOS\s*(?:o\s*Total\s*[:])?\s*([0-9]+)",
-    r"\bTotal\s+([0-9]+)\b",
-])
-
-
-def extract_conva_header(pdf_path: str, max_pages: int = 4) -> ConvaHeader:
-    nombre_pdf = os.path.basename(pdf_path)
+def _compile_lower(pattern: str) -> re.Pattern:
+    """
+    Compila el patrón en minúsculas y sin IGNORECASE, para buscarlo sobre
+    el texto ya en minúsculas (no usar escapes en mayúscula como \\S o \\D).
+    Sin IGNORECASE, `re` puede saltar directo al literal con que empieza el patrón.
+    """
+    return re.compile(pattern.lower())
+
+
+def _lower_same_length(text: str) -> str:
+    """
+    text.lower() conservando la longitud, para poder usar los spans del texto
+    en minúsculas sobre el original (p. ej. "İ" pasa a dos caracteres).
+    """
+    low = text.lower()
+    if len(low) == len(text):
+        return low
+    return "".join(lc if len(lc := c.lower()) == 1 else c for c in text)
+
+
+# (campo, clave, patrón) en orden de prioridad: por campo gana el primer patrón
+# que coincida. La clave es texto en minúsculas que toda coincidencia del patrón
+# contiene: si no aparece en la página, el patrón ni se prueba (la mayoría de
+# páginas 2+). Todos capturan el valor en el grupo 1.
+PATRONES_CABECERA = [
+    ("nombre", "nombres:", _compile_lower(r"Apellidos\s+y\s+Nombres:\s*([^\n]+)")),
+    ("codigo", "estudiante:", _compile_lower(r"ID\s*Estudiante:\s*(N\d+)")),
+    ("codigo", "código:", _compile_lower(r"Código:\s*(N\d+)")),
+    ("carrera", "upn:", _compile_lower(r"Carrera\s+en\s+UPN:\s*([^\n]+)")),
+    ("carrera", "upn:", _compile_lower(r"Carrera\s+UPN:\s*([^\n]+)")),
+    ("campus", "campus:", _compile_lower(r"Campus:\s*([^\n]+)")),
+    ("plan", "estudios:", _compile_lower(r"Plan\s+de\s+Estudios:\s*([A-Za-z0-9.\-]+)")),
+    ("fecha", "fecha:", _compile_lower(r"Fecha:\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{4})")),
+    ("version", "versión", _compile_lower(r"Versión\s+ExcelConva:\s*([0-9.]+)")),
+    ("version", "versión", _compile_lower(r"Versión\s+Conva2025G\s*:\s*([0-9.]+)")),
+    ("version", "versión", _compile_lower(r"Versión\s+Conva\s*:\s*([^\n]+)")),
+    ("total", "total", _compile_lower(r"TOTAL\s+DE\s+CRÉDITOS\s*(?:o\s*Total\s*[:])?\s*([0-9]+)")),
+    # aquí el \b sí hace falta: evita leer "Subtotal 12" como total
+    ("total", "total", _compile_lower(r"\bTotal\s+([0-9]+)\b")),
+    ("observ", "paquete", _compile_lower(r"(Convalidación\s+por\s+paquete\s*\([^\)]+\))")),
+    ("observ", "paquete", _compile_lower(r"(Convalidación\s+por\s+paquete)")),
+]
+CAMPOS_CABECERA = tuple(dict.fromkeys(campo for campo, _, _ in PATRONES_CABECERA))
+CLAVES_CABECERA = tuple(dict.fromkeys(clave for _, clave, _ in PATRONES_CABECERA))
+
+
+def extract_conva_header(
+    pdf_path: str, max_pages: int = 2, nombre_pdf: Optional[str] = None
+) -> ConvaHeader:
+    if nombre_pdf is None:
+        nombre_pdf = os.path.basename(pdf_path)
+    _verificar_pdf(pdf_path)
 
     titulo = None
-    nombre_raw = None
-    codigo = None
-    carrera_raw = None
-    campus = None
-    plan = None
-    fecha = None
-    version = None
-    total = None
-    observ = None
+    campos: Dict[str, Optional[str]] = dict.fromkeys(CAMPOS_CABECERA)
 
     found = 0
     need_min = 7
 
-    with pdfplumber.open(pdf_path) as pdf:
-        if getattr(pdf, "is_encrypted", False):
+    with fitz.open(pdf_path) as doc:
+        if doc.needs_pass:
             raise ValueError("PDF encriptado/no legible")
 
-        n = min(len(pdf.pages), max_pages)
+        n = min(doc.page_count, max_pages)
 
         for i in range(n):
-            txt = pdf.pages[i].extract_text() or ""
+            txt = doc.load_page(i).get_text("text", flags=FLAGS_TEXTO, sort=True) or ""
             if not txt.strip():
                 continue
 
+            low = _lower_same_length(txt)
+
             # ✅ título: se toma de la primera página que tenga texto
             if titulo is None:
                 titulo = _extraer_titulo_pdf(txt)
 
-            if nombre_raw is None:
-                nombre_raw = _extract_first_compiled(PATRONES_NOMBRE, txt)
-                if nombre_raw:
-                    found += 1
-
-            if codigo is None:
-                codigo = _extract_first_compiled(PATRONES_CODIGO, txt)
-                if codigo:
-                    found += 1
-
-            if carrera_raw is None:
-                carrera_raw = _extract_first_compiled(PATRONES_CARRERA, txt)
-                if carrera_raw:
-                    found += 1
-
-            if campus is None:
-                campus = _extract_first_compiled(PATRONES_CAMPUS, txt)
-                if campus:
-                    found += 1
-
-            if plan is None:
-                plan = _extract_first_compiled(PATRONES_PLAN, txt)
-                if plan:
-                    found += 1
-
-            if fecha is None:
-                fecha = _extract_first_compiled(PATRONES_FECHA, txt)
-                if fecha:
-                    found += 1
-
-            if version is None:
-                version = _extract_first_compiled(PATRONES_VERSION, txt)
-                if version:
-                    found += 1
-
-            if total is None:
-                total = _extract_first_compiled(PATRONES_TOTAL, txt)
-                if total:
-                    found += 1
-
-            if observ is None:
-                observ = _extraer_observacion_paquete(txt)
-                if observ:
-                    found += 1
+            # cada clave se busca una sola vez por página, aunque la compartan varios patrones
+            presentes = {clave for clave in CLAVES_CABECERA if clave in low}
+            for campo, clave, rx in PATRONES_CABECERA:
+                if campos[campo] is None and clave in presentes:
+                    mt = rx.search(low)
+                    if mt:
+                        # el valor se recorta del texto original, no de `low`
+                        valor = _clean_spaces(txt[mt.start(1):mt.end(1)])
+                        campos[campo] = valor
+                        if valor:
+                            found += 1
 
             if found >= need_min and titulo is not None:
                 break
 
+    carrera_raw = campos["carrera"]
     carrera_limpia = None
     if carrera_raw:
-        carrera_limpia = _clean_spaces(re.sub(r"\s+Modalidad:.*$", "", carrera_raw, flags=re.IGNORECASE))
+        # carrera_raw ya viene con espacios simples: basta cortar en " Modalidad:"
+        idx = carrera_raw.lower().find(" modalidad:")
+        if idx != -1:
+            carrera_raw = carrera_raw[:idx]
+        carrera_limpia = _clean_spaces(carrera_raw)
 
     return ConvaHeader(
         titulo_pdf=titulo,
-        apellidos_nombres=_limpiar_nombre(nombre_raw),
-        codigo=codigo,
+        apellidos_nombres=_limpiar_nombre(campos["nombre"]),
+        codigo=campos["codigo"],
         carrera_upn=carrera_limpia,
-        campus=campus,
-        plan_estudios=plan,
-        fecha=fecha,
-        version_excelconva=version,
-        total_creditos=total,
-        observaciones=observ,
+        campus=campos["campus"],
+        plan_estudios=campos["plan"],
+        fecha=campos["fecha"],
+        version_excelconva=campos["version"],
+        total_creditos=campos["total"],
+        observaciones=campos["observ"],
         nombre_pdf=nombre_pdf,
         ruta_pdf=pdf_path,
     )
 
 
-def header_to_row(h: ConvaHeader) -> Dict[str, Any]:
-    d = asdict(h)
-    return {
-        "Título PDF": d["titulo_pdf"],
-        "Apellidos y Nombres": d["apellidos_nombres"],
-        "Código": d["codigo"],
-        "Carrera en UPN": d["carrera_upn"],
-        "Campus": d["campus"],
-        "Plan de Estudios": d["plan_estudios"],
-        "Fecha": d["fecha"],
-        "Versión ExcelConva": d["version_excelconva"],
-        "Total de Créditos": d["total_creditos"],
-        "Observaciones": d["observaciones"],
-        "Nombre_PDF": d["nombre_pdf"],
-    }
-
-
-def abrir_archivo(path: str):
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"No existe: {path}")
-    if os.name == "nt":
-        os.startfile(path)  # type: ignore
-    elif hasattr(os, "uname") and os.uname().sysname == "Darwin":
-        subprocess.Popen(["open", path])
-    else:
-        subprocess.Popen(["xdg-open", path])
+# Columna del Excel -> atributo de ConvaHeader
+COLUMNAS_EXCEL = (
+    ("Título PDF", "titulo_pdf"),
+    ("Apellidos y Nombres", "apellidos_nombres"),
+    ("Código", "codigo"),
+    ("Carrera en UPN", "carrera_upn"),
+    ("Campus", "campus"),
+    ("Plan de Estudios", "plan_estudios"),
+    ("Fecha", "fecha"),
+    ("Versión ExcelConva", "version_excelconva"),
+    ("Total de Créditos", "total_creditos"),
+    ("Observaciones", "observaciones"),
+    ("Nombre_PDF", "nombre_pdf"),
+)
+COLUMNS = [col for col, _ in COLUMNAS_EXCEL]
+
+# header_values(h) -> tupla con los valores de la fila, en el orden de COLUMNS
+header_values = attrgetter(*(attr for _, attr in COLUMNAS_EXCEL))
 
 
 def main(page: ft.Page):
@@ -273,24 +229,9 @@ def main(page: ft.Page):
     page.window_width = 1100
     page.window_height = 520
 
-    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-    excel_path = os.path.join(BASE_DIR, "resultado_conva.xlsx")
-
-    columns = [
-        "Título PDF",
-        "Apellidos y Nombres",
-        "Código",
-        "Carrera en UPN",
-        "Campus",
-        "Plan de Estudios",
-        "Fecha",
-        "Versión ExcelConva",
-        "Total de Créditos",
-        "Observaciones",
-        "Nombre_PDF",
-    ]
-
-    registros: List[Dict[str, Any]] = []
+    excel_path = str(EXCEL_PATH)
+
+    registros: List[ConvaHeader] = []
     lock = threading.Lock()
 
     cancel_flag = {"stop": False}
@@ -348,8 +289,8 @@ def main(page: ft.Page):
                 status.value = "No hay datos para exportar."
                 page.update()
                 return
-            df = pd.DataFrame(registros, columns=columns)
-        df.to_excel(excel_path, index=False)
+            filas = list(registros)
+        write_excel(excel_path, COLUMNS, map(header_values, filas))
         status.value = f"Excel exportado ✅: {excel_path}"
         page.update()
 
@@ -377,7 +318,7 @@ def main(page: ft.Page):
     def cancel(_):
         cancel_flag["stop"] = True
         btn_cancel.disabled = True
-        status.value = "Cancelando... (terminará el PDF actual)"
+        status.value = "Cancelando... (terminarán los PDFs en curso)"
         page.update()
 
     btn_export.on_click = export_excel
@@ -392,6 +333,9 @@ def main(page: ft.Page):
             page.update()
             return
 
+        # ✅ Tkinter (selector nativo Windows): se importa al abrir el selector, no al arrancar
+        from tkinter import Tk, filedialog
+
         root = Tk()
         root.withdraw()
         root.attributes("-topmost", True)
@@ -423,44 +367,104 @@ def main(page: ft.Page):
         def worker():
             ok = 0
             errores = 0
-            try:
-                for i, pdf_path in enumerate(paths, start=1):
+            procesados = 0
+            ultimo_pct = -1
+            # el pool termina en cualquier orden: cada fila va a la posición
+            # de su PDF y al final se pasan a registros en el orden elegido
+            filas: List[Optional[ConvaHeader]] = [None] * total_files
+
+            def registrar(idx: int, current_name: str, h: Optional[ConvaHeader], error: Optional[Exception]):
+                nonlocal ok, errores, procesados, ultimo_pct
+                if error is None:
+                    ok += 1
+                else:
+                    errores += 1
+                    h = ConvaHeader(observaciones=f"ERROR: {str(error)}", nombre_pdf=current_name)
+
+                filas[idx] = h
+
+                procesados += 1
+                # avisa cada 16 PDFs (máscara en vez de módulo) si cambió el
+                # porcentaje entero, y siempre al terminar
+                pct = procesados * 100 // total_files
+                if ((procesados & 15) == 0 and pct != ultimo_pct) or procesados == total_files:
+                    ultimo_pct = pct
+                    p = procesados / total_files
+                    st = f"Procesando... {procesados}/{total_files} | OK: {ok} | Errores: {errores}"
+                    page.pubsub.send_all({
+                        "type": "progress",
+                        "p": p,
+                        "status": st,
+                        "current": f"PDF actual: {current_name}",
+                    })
+
+            def extraer():
+                # los que ya están en caché se registran sin pasar por el pool
+                pendientes = []
+                for idx, pdf_path in enumerate(paths):
                     if cancel_flag["stop"]:
                         break
-
                     current_name = os.path.basename(pdf_path)
                     try:
-                        h = extract_conva_header(pdf_path, max_pages=4)
-                        row = header_to_row(h)
-                        ok += 1
+                        key = _header_cache_key(pdf_path, 2)
                     except Exception as ex:
-                        errores += 1
-                        row = {
-                            "Título PDF": None,
-                            "Apellidos y Nombres": None,
-                            "Código": None,
-                            "Carrera en UPN": None,
-                            "Campus": None,
-                            "Plan de Estudios": None,
-                            "Fecha": None,
-                            "Versión ExcelConva": None,
-                            "Total de Créditos": None,
-                            "Observaciones": f"ERROR: {str(ex)}",
-                            "Nombre_PDF": current_name,
-                        }
+                        registrar(idx, current_name, None, ex)
+                        continue
+                    h = _header_cache.get(key)
+                    if h is not None:
+                        registrar(idx, current_name, h, None)
+                    else:
+                        pendientes.append((idx, pdf_path, current_name, key))
+
+                if pendientes and not cancel_flag["stop"]:
+                    # si el pool de procesos se rompe (p. ej. no pudo arrancar sus
+                    # procesos), lo que no llegó a extraer se hace en este hilo
+                    rotos = []
+                    pool = _make_pool(len(pendientes))
+                    try:
+                        futures = {}
+                        for item in pendientes:
+                            try:
+                                futures[pool.submit(extract_conva_header, item[1], nombre_pdf=item[2])] = item
+                            except BrokenProcessPool:
+                                rotos.append(item)
+                        for fut in as_completed(futures):
+                            idx, pdf_path, current_name, key = futures[fut]
+                            try:
+                                h = fut.result()
+                            except BrokenProcessPool:
+                                rotos.append((idx, pdf_path, current_name, key))
+                            except Exception as ex:
+                                registrar(idx, current_name, None, ex)
+                            else:
+                                _header_cache_put(key, h)
+                                registrar(idx, current_name, h, None)
+
+                            if cancel_flag["stop"]:
+                                break
+                    finally:
+                        pool.shutdown(wait=True, cancel_futures=True)
+
+                    for idx, pdf_path, current_name, key in rotos:
+                        if cancel_flag["stop"]:
+                            break
+                        try:
+                            h = extract_conva_header(pdf_path, nombre_pdf=current_name)
+                        except Exception as ex:
+                            registrar(idx, current_name, None, ex)
+                        else:
+                            _header_cache_put(key, h)
+                            registrar(idx, current_name, h, None)
+
+                    save_header_cache(str(CACHE_PATH))
 
+            try:
+                try:
+                    extraer()
+                finally:
+                    # si se canceló, quedan fuera los PDFs que no llegaron a procesarse
                     with lock:
-                        registros.append(row)
-
-                    if i % 10 == 0 or i == total_files:
-                        p = i / total_files
-                        st = f"Procesando... {i}/{total_files} | OK: {ok} | Errores: {errores}"
-                        page.pubsub.send_all({
-                            "type": "progress",
-                            "p": p,
-                            "status": st,
-                            "current": f"PDF actual: {current_name}",
-                        })
+                        registros.extend(h for h in filas if h is not None)
 
                 if cancel_flag["stop"]:
                     final = f"Cancelado 🛑 | Procesados: {len(registros)} | OK: {ok} | Errores: {errores}"
@@ -486,7 +490,7 @@ def main(page: ft.Page):
             controls=[
                 ft.Text("Extractor de Convalidaciones (PDF → Excel)", size=20, weight=ft.FontWeight.BOLD),
                 ft.Text(
-                    "Procesa 1 por 1 y genera un Excel final. Sin tabla en pantalla (más rápido).",
+                    "Procesa en paralelo y genera un Excel final. Sin tabla en pantalla (más rápido).",
                     size=12, color=ft.Colors.GREY_700
                 ),
                 ft.Row([btn_pick, btn_export, btn_open, btn_clear, btn_cancel], wrap=True),
@@ -503,4 +507,9 @@ def main(page: ft.Page):
 
 
 if __name__ == "__main__":
+    # en el .exe congelado los procesos del pool arrancan por aquí
+    multiprocessing.freeze_support()
+    # una vez por arranque, no por cada sesión de Flet
+    load_header_cache(str(CACHE_PATH))
+    atexit.register(save_header_cache, str(CACHE_PATH))
     ft.run(main)
\ No newline at end of file
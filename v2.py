@@ -1,60 +1,57 @@
+import atexit
+import multiprocessing
 import os
 import re
-import subprocess
 import threading
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any, List
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from operator import attrgetter
+from pathlib import Path
+from typing import Optional, Any, Dict, List
 
+import fitz  # PyMuPDF
 import flet as ft
-import pdfplumber
-import pandas as pd
-
-from tkinter import Tk, filedialog
-
-
-@dataclass
-class ConvaHeader:
-    titulo_pdf: Optional[str] = None
-    apellidos_nombres: Optional[str] = None
-    codigo: Optional[str] = None
-    institucion_procedencia: Optional[str] = None
-    carrera_procedencia: Optional[str] = None
-    carrera_upn: Optional[str] = None
-    modalidad: Optional[str] = None
-    campus: Optional[str] = None
-    plan_estudios: Optional[str] = None
-    fecha: Optional[str] = None
-    version_excelconva: Optional[str] = None
-    total_creditos: Optional[str] = None
-    observaciones: Optional[str] = None
-    nombre_pdf: Optional[str] = None
-    ruta_pdf: Optional[str] = None
 
+from _core import (
+    FLAGS_TEXTO,
+    ConvaHeader,
+    _compile_patterns,
+    _header_cache,
+    _header_cache_key,
+    _header_cache_put,
+    _limpiar_nombre,
+    _make_pool,
+    _verificar_pdf,
+    abrir_archivo,
+    load_header_cache,
+    save_header_cache,
+    write_excel,
+)
+
+BASE_DIR = Path(__file__).resolve().parent
+EXCEL_PATH = BASE_DIR / "resultado_conva.xlsx"
+# v2 extrae más campos que main.py: cada app guarda su propia caché
+CACHE_PATH = BASE_DIR / ".conva_cache_v2.json"
+
+
+PATRON_ESPACIOS_LINEA = re.compile(r"[ \t]+")
+PATRON_SALTOS = re.compile(r"\n{2,}")
+PATRON_TITULO = re.compile(
+    r"\b(RESULTADO\s+DE\s+CONVALIDACI[ÓO]N|CURSOS\s+RECOMENDADOS\s+PARA\s+EL\s+REGISTRO\s+DE\s+CURSO)\b",
+    re.IGNORECASE
+)
 
-def _clean_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", str(s or "")).strip()
-
-
-def _compile_patterns(patterns: List[str], flags=re.IGNORECASE) -> List[re.Pattern]:
-    return [re.compile(p, flags) for p in patterns]
 
-
-def _extract_first_compiled(patterns: List[re.Pattern], text: str) -> Optional[str]:
-    for pat in patterns:
-        m = pat.search(text)
-        if m:
-            val = m.group(1)
-            if val is not None:
-                return _clean_spaces(val)
-    return None
+def _clean_spaces(s: str) -> str:
+    return " ".join(str(s or "").split())
 
 
 def _normalizar_texto_pdf(text: str) -> str:
     if not text:
         return ""
     text = text.replace("\xa0", " ")
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{2,}", "\n", text)
+    text = PATRON_ESPACIOS_LINEA.sub(" ", text)
+    text = PATRON_SALTOS.sub("\n", text)
     return text.strip()
 
 
@@ -69,11 +66,7 @@ def _extraer_titulo_pdf(text: str) -> Optional[str]:
     text = _normalizar_texto_pdf(text)
 
     # 1) Prioridad total al título esperado
-    m = re.search(
-        r"\b(RESULTADO\s+DE\s+CONVALIDACI[ÓO]N|CURSOS\s+RECOMENDADOS\s+PARA\s+EL\s+REGISTRO\s+DE\s+CURSO)\b",
-        text,
-        re.IGNORECASE
-    )
+    m = PATRON_TITULO.search(text)
     if m:
         return _clean_spaces(m.group(1)).upper()
 
@@ -118,224 +111,135 @@ def _extraer_titulo_pdf(text: str) -> Optional[str]:
     return None
 
 
-def _limpiar_nombre(nombre_raw: Optional[str]) -> Optional[str]:
-    if not nombre_raw:
-        return None
-
-    nombre = str(nombre_raw)
-    cortes = [
-        " ID Estudiante:",
-        " ID ESTUDIANTE:",
-        " Código:",
-        " CODIGO:",
-        " Código",
-        " Codigo:",
+# (campo, clave, patrón) en orden de prioridad: por campo gana el primer patrón
+# que coincida. La clave es texto en minúsculas que toda coincidencia del patrón
+# contiene: si no aparece en la página, el patrón ni se prueba (la mayoría de
+# páginas 2+). Todos capturan el valor en el grupo 1.
+PATRONES_CABECERA = [
+    (campo, clave, re.compile(patron, re.IGNORECASE))
+    for campo, clave, patron in [
+        ("nombre", "nombres:", r"Apellidos\s+y\s+Nombres:\s*(.+?)(?=\s+ID\s*Estudiante:|\n|$)"),
+        ("codigo", "estudiante:", r"\bID\s*Estudiante:\s*(N\d+)"),
+        ("codigo", "digo:", r"\bC[oó]digo:\s*(N\d+)"),
+        ("institucion", "procedencia:",
+         r"Instituci[oó]n\s+de\s+Procedencia:\s*(.+?)(?=\n|Carrera\s+de\s+Procedencia:|$)"),
+        ("carrera_proc", "procedencia:",
+         r"Carrera\s+de\s+Procedencia:\s*(.+?)(?=\n|Carrera\s+UPN:|Carrera\s+en\s+UPN:|$)"),
+        ("carrera", "upn:", r"Carrera\s+en\s+UPN:\s*(.+?)(?=\n|Modalidad:|$)"),
+        ("carrera", "upn:", r"Carrera\s+UPN:\s*(.+?)(?=\n|Modalidad:|$)"),
+        ("modalidad", "modalidad:", r"Modalidad:\s*(.+?)(?=\n|Nombre\s+del\s+Curso|$)"),
+        ("campus", "campus:", r"Campus:\s*(.+?)(?=\n|Plan\s+de\s+Estudios:|$)"),
+        ("plan", "estudios:", r"Plan\s+de\s+Estudios:\s*([A-Za-z0-9.\-]+)"),
+        ("fecha", "fecha:", r"\bFecha:\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{4})"),
+        ("fecha", "fecha:", r"\bFecha:\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{2})"),
+        ("version", "versi", r"Versi[oó]n\s+ExcelConva:\s*([0-9.]+)"),
+        ("version", "versi", r"Versi[oó]n\s+Conva2025G\s*:\s*([0-9.]+)"),
+        ("version", "versi", r"Versi[oó]n\s+Conva\s*:\s*([^\n]+)"),
+        ("total", "total", r"TOTAL\s+DE\s+CR[ÉE]DITOS\s*(?:o\s*Total\s*[:])?\s*([0-9]+)"),
+        ("total", "total", r"\bTotal\s+([0-9]+)\b"),
+        ("observ", "paquete", r"(Convalidaci[oó]n\s+por\s+paquete\s*\([^\)]+\))"),
+        ("observ", "paquete", r"(Convalidaci[oó]n\s+por\s+paquete)"),
     ]
+]
+CAMPOS_CABECERA = tuple(dict.fromkeys(campo for campo, _, _ in PATRONES_CABECERA))
+CLAVES_CABECERA = tuple(dict.fromkeys(clave for _, clave, _ in PATRONES_CABECERA))
 
-    low = nombre.lower()
-    for c in cortes:
-        idx = low.find(c.lower())
-        if idx != -1:
-            nombre = nombre[:idx]
-            break
-
-    return _clean_spaces(nombre)
-
-
-def _extraer_observacion_paquete(text: str) -> Optional[str]:
-    m = re.search(r"(Convalidaci[oó]n\s+por\s+paquete\s*\([^\)]+\))", text, re.IGNORECASE)
-    if m:
-        return _clean_spaces(m.group(1))
-
-    m2 = re.search(r"(Convalidaci[oó]n\s+por\s+paquete)", text, re.IGNORECASE)
-    if m2:
-        return _clean_spaces(m2.group(1))
-
-    return None
-
-
-PATRONES_NOMBRE = _compile_patterns([
-    r"Apellidos\s+y\s+Nombres:\s*(.+?)(?=\s+ID\s*Estudiante:|\n|$)"
-])
-
-PATRONES_CODIGO = _compile_patterns([
-    r"\bID\s*Estudiante:\s*(N\d+)",
-    r"\bC[oó]digo:\s*(N\d+)"
-])
-
-PATRONES_INSTITUCION = _compile_patterns([
-    r"Instituci[oó]n\s+de\s+Procedencia:\s*(.+?)(?=\n|Carrera\s+de\s+Procedencia:|$)"
-])
-
-PATRONES_CARRERA_PROCEDENCIA = _compile_patterns([
-    r"Carrera\s+de\s+Procedencia:\s*(.+?)(?=\n|Carrera\s+UPN:|Carrera\s+en\s+UPN:|$)"
-])
-
+# Carrera y modalidad en la misma línea (dos grupos): se prueba antes que los
+# patrones sueltos de carrera y modalidad.
 PATRONES_CARRERA_MODALIDAD = _compile_patterns([
     r"Carrera\s+UPN:\s*(.+?)\s+Modalidad:\s*(.+?)(?=\n|Nombre\s+del\s+Curso|$)",
     r"Carrera\s+en\s+UPN:\s*(.+?)\s+Modalidad:\s*(.+?)(?=\n|Nombre\s+del\s+Curso|$)"
 ])
 
-PATRONES_CARRERA = _compile_patterns([
-    r"Carrera\s+en\s+UPN:\s*(.+?)(?=\n|Modalidad:|$)",
-    r"Carrera\s+UPN:\s*(.+?)(?=\n|Modalidad:|$)"
-])
-
-PATRONES_MODALIDAD = _compile_patterns([
-    r"Modalidad:\s*(.+?)(?=\n|Nombre\s+del\s+Curso|$)"
-])
-
-PATRONES_CAMPUS = _compile_patterns([
-    r"Campus:\s*(.+?)(?=\n|Plan\s+de\s+Estudios:|$)"
-])
-
-PATRONES_PLAN = _compile_patterns([
-    r"Plan\s+de\s+Estudios:\s*([A-Za-z0-9.\-]+)"
-])
-
-PATRONES_FECHA = _compile_patterns([
-    r"\bFecha:\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{4})",
-    r"\bFecha:\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{2})"
-])
-
-PATRONES_VERSION = _compile_patterns([
-    r"Versi[oó]n\s+ExcelConva:\s*([0-9.]+)",
-    r"Versi[oó]n\s+Conva2025G\s*:\s*([0-9.]+)",
-    r"Versi[oó]n\s+Conva\s*:\s*([^\n]+)"
-])
-
-PATRONES_TOTAL = _compile_patterns([
-    r"TOTAL\s+DE\s+CR[ÉE]DITOS\s*(?:o\s*Total\s*[:])?\s*([0-9]+)",
-    r"\bTotal\s+([0-9]+)\b"
-])
-
 
-def extract_conva_header(pdf_path: str, max_pages: int = 4) -> ConvaHeader:
-    nombre_pdf = os.path.basename(pdf_path)
+def extract_conva_header(
+    pdf_path: str, max_pages: int = 4, nombre_pdf: Optional[str] = None
+) -> ConvaHeader:
+    if nombre_pdf is None:
+        nombre_pdf = os.path.basename(pdf_path)
+    _verificar_pdf(pdf_path)
 
     titulo = None
-    nombre_raw = None
-    codigo = None
-    institucion = None
-    carrera_proc = None
-    carrera_upn = None
-    modalidad = None
-    campus = None
-    plan = None
-    fecha = None
-    version = None
-    total = None
-    observ = None
-
-    with pdfplumber.open(pdf_path) as pdf:
-        if getattr(pdf, "is_encrypted", False):
+    campos: Dict[str, Optional[str]] = dict.fromkeys(CAMPOS_CABECERA)
+
+    with fitz.open(pdf_path) as doc:
+        if doc.needs_pass:
             raise ValueError("PDF encriptado/no legible")
 
-        n = min(len(pdf.pages), max_pages)
+        n = min(doc.page_count, max_pages)
 
         for i in range(n):
-            txt = pdf.pages[i].extract_text() or ""
+            txt = doc.load_page(i).get_text("text", flags=FLAGS_TEXTO, sort=True) or ""
             txt = _normalizar_texto_pdf(txt)
 
             if not txt.strip():
                 continue
 
+            low = txt.lower()
+
             if titulo is None:
                 titulo = _extraer_titulo_pdf(txt)
 
-            if nombre_raw is None:
-                nombre_raw = _extract_first_compiled(PATRONES_NOMBRE, txt)
-
-            if codigo is None:
-                codigo = _extract_first_compiled(PATRONES_CODIGO, txt)
-
-            if institucion is None:
-                institucion = _extract_first_compiled(PATRONES_INSTITUCION, txt)
-
-            if carrera_proc is None:
-                carrera_proc = _extract_first_compiled(PATRONES_CARRERA_PROCEDENCIA, txt)
-
-            if carrera_upn is None or modalidad is None:
+            if (campos["carrera"] is None or campos["modalidad"] is None) and "upn:" in low:
                 for pat in PATRONES_CARRERA_MODALIDAD:
                     m = pat.search(txt)
                     if m:
-                        carrera_upn = _clean_spaces(m.group(1))
-                        modalidad = _clean_spaces(m.group(2))
+                        campos["carrera"] = _clean_spaces(m.group(1))
+                        campos["modalidad"] = _clean_spaces(m.group(2))
                         break
 
-            if carrera_upn is None:
-                carrera_upn = _extract_first_compiled(PATRONES_CARRERA, txt)
-
-            if modalidad is None:
-                modalidad = _extract_first_compiled(PATRONES_MODALIDAD, txt)
-
-            if campus is None:
-                campus = _extract_first_compiled(PATRONES_CAMPUS, txt)
-
-            if plan is None:
-                plan = _extract_first_compiled(PATRONES_PLAN, txt)
-
-            if fecha is None:
-                fecha = _extract_first_compiled(PATRONES_FECHA, txt)
-
-            if version is None:
-                version = _extract_first_compiled(PATRONES_VERSION, txt)
-
-            if total is None:
-                total = _extract_first_compiled(PATRONES_TOTAL, txt)
+            # cada clave se busca una sola vez por página, aunque la compartan varios patrones
+            presentes = {clave for clave in CLAVES_CABECERA if clave in low}
+            for campo, clave, rx in PATRONES_CABECERA:
+                if campos[campo] is None and clave in presentes:
+                    m = rx.search(txt)
+                    if m:
+                        campos[campo] = _clean_spaces(m.group(1))
 
-            if observ is None:
-                observ = _extraer_observacion_paquete(txt)
+            # con todo encontrado no hace falta abrir las páginas siguientes
+            if titulo is not None and None not in campos.values():
+                break
 
     return ConvaHeader(
         titulo_pdf=titulo,
-        apellidos_nombres=_limpiar_nombre(nombre_raw),
-        codigo=codigo,
-        institucion_procedencia=institucion,
-        carrera_procedencia=carrera_proc,
-        carrera_upn=carrera_upn,
-        modalidad=modalidad,
-        campus=campus,
-        plan_estudios=plan,
-        fecha=fecha,
-        version_excelconva=version,
-        total_creditos=total,
-        observaciones=observ,
+        apellidos_nombres=_limpiar_nombre(campos["nombre"]),
+        codigo=campos["codigo"],
+        institucion_procedencia=campos["institucion"],
+        carrera_procedencia=campos["carrera_proc"],
+        carrera_upn=campos["carrera"],
+        modalidad=campos["modalidad"],
+        campus=campos["campus"],
+        plan_estudios=campos["plan"],
+        fecha=campos["fecha"],
+        version_excelconva=campos["version"],
+        total_creditos=campos["total"],
+        observaciones=campos["observ"],
         nombre_pdf=nombre_pdf,
         ruta_pdf=pdf_path,
     )
 
 
-def header_to_row(h: ConvaHeader) -> Dict[str, Any]:
-    d = asdict(h)
-    return {
-        "Título PDF": d["titulo_pdf"],
-        "Apellidos y Nombres": d["apellidos_nombres"],
-        "Código": d["codigo"],
-        "Institución de Procedencia": d["institucion_procedencia"],
-        "Carrera de Procedencia": d["carrera_procedencia"],
-        "Carrera en UPN": d["carrera_upn"],
-        "Modalidad": d["modalidad"],
-        "Campus": d["campus"],
-        "Plan de Estudios": d["plan_estudios"],
-        "Fecha": d["fecha"],
-        "Versión ExcelConva": d["version_excelconva"],
-        "Total de Créditos": d["total_creditos"],
-        "Observaciones": d["observaciones"],
-        "Nombre_PDF": d["nombre_pdf"],
-    }
-
-
-def abrir_archivo(path: str):
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"No existe: {path}")
-
-    if os.name == "nt":
-        os.startfile(path)  # type: ignore
-    elif hasattr(os, "uname") and os.uname().sysname == "Darwin":
-        subprocess.Popen(["open", path])
-    else:
-        subprocess.Popen(["xdg-open", path])
+# Columna del Excel -> atributo de ConvaHeader
+COLUMNAS_EXCEL = (
+    ("Título PDF", "titulo_pdf"),
+    ("Apellidos y Nombres", "apellidos_nombres"),
+    ("Código", "codigo"),
+    ("Institución de Procedencia", "institucion_procedencia"),
+    ("Carrera de Procedencia", "carrera_procedencia"),
+    ("Carrera en UPN", "carrera_upn"),
+    ("Modalidad", "modalidad"),
+    ("Campus", "campus"),
+    ("Plan de Estudios", "plan_estudios"),
+    ("Fecha", "fecha"),
+    ("Versión ExcelConva", "version_excelconva"),
+    ("Total de Créditos", "total_creditos"),
+    ("Observaciones", "observaciones"),
+    ("Nombre_PDF", "nombre_pdf"),
+)
+COLUMNS = [col for col, _ in COLUMNAS_EXCEL]
+
+# header_values(h) -> tupla con los valores de la fila, en el orden de COLUMNS
+header_values = attrgetter(*(attr for _, attr in COLUMNAS_EXCEL))
 
 
 def main(page: ft.Page):
@@ -344,27 +248,9 @@ def main(page: ft.Page):
     page.window_width = 1100
     page.window_height = 520
 
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    excel_path = os.path.join(base_dir, "resultado_conva.xlsx")
-
-    columns = [
-        "Título PDF",
-        "Apellidos y Nombres",
-        "Código",
-        "Institución de Procedencia",
-        "Carrera de Procedencia",
-        "Carrera en UPN",
-        "Modalidad",
-        "Campus",
-        "Plan de Estudios",
-        "Fecha",
-        "Versión ExcelConva",
-        "Total de Créditos",
-        "Observaciones",
-        "Nombre_PDF",
-    ]
+    excel_path = str(EXCEL_PATH)
 
-    registros: List[Dict[str, Any]] = []
+    registros: List[ConvaHeader] = []
     lock = threading.Lock()
 
     cancel_flag = {"stop": False}
@@ -422,9 +308,9 @@ def main(page: ft.Page):
                 page.update()
                 return
 
-            df = pd.DataFrame(registros, columns=columns)
+            filas = list(registros)
 
-        df.to_excel(excel_path, index=False)
+        write_excel(excel_path, COLUMNS, map(header_values, filas))
         status.value = f"Excel exportado ✅: {excel_path}"
         page.update()
 
@@ -454,7 +340,7 @@ def main(page: ft.Page):
     def cancel(_):
         cancel_flag["stop"] = True
         btn_cancel.disabled = True
-        status.value = "Cancelando... (terminará el PDF actual)"
+        status.value = "Cancelando... (terminarán los PDFs en curso)"
         page.update()
 
     btn_export.on_click = export_excel
@@ -468,6 +354,9 @@ def main(page: ft.Page):
             page.update()
             return
 
+        # se importa al abrir el selector, no al arrancar
+        from tkinter import Tk, filedialog
+
         root = Tk()
         root.withdraw()
         root.attributes("-topmost", True)
@@ -501,48 +390,103 @@ def main(page: ft.Page):
         def worker():
             ok = 0
             errores = 0
+            procesados = 0
+            ultimo_pct = -1
+            # el pool termina en cualquier orden: cada fila va a la posición
+            # de su PDF y al final se pasan a registros en el orden elegido
+            filas: List[Optional[ConvaHeader]] = [None] * total_files
+
+            def registrar(idx: int, current_name: str, h: Optional[ConvaHeader], error: Optional[Exception]):
+                nonlocal ok, errores, procesados, ultimo_pct
+                if error is None:
+                    ok += 1
+                else:
+                    errores += 1
+                    h = ConvaHeader(observaciones=f"ERROR: {str(error)}", nombre_pdf=current_name)
+
+                filas[idx] = h
+
+                procesados += 1
+                # solo avisa cuando cambia el porcentaje entero, y al terminar
+                pct = procesados * 100 // total_files
+                if pct != ultimo_pct or procesados == total_files:
+                    ultimo_pct = pct
+                    p = procesados / total_files
+                    st = f"Procesando... {procesados}/{total_files} | OK: {ok} | Errores: {errores}"
+                    page.pubsub.send_all({
+                        "type": "progress",
+                        "p": p,
+                        "status": st,
+                        "current": f"PDF actual: {current_name}",
+                    })
 
-            try:
-                for i, pdf_path in enumerate(paths, start=1):
+            def extraer():
+                # los que ya están en caché se registran sin pasar por el pool
+                pendientes = []
+                for idx, pdf_path in enumerate(paths):
                     if cancel_flag["stop"]:
                         break
-
                     current_name = os.path.basename(pdf_path)
-
                     try:
-                        h = extract_conva_header(pdf_path, max_pages=4)
-                        row = header_to_row(h)
-                        ok += 1
+                        key = _header_cache_key(pdf_path, 4)
                     except Exception as ex:
-                        errores += 1
-                        row = {
-                            "Título PDF": None,
-                            "Apellidos y Nombres": None,
-                            "Código": None,
-                            "Institución de Procedencia": None,
-                            "Carrera de Procedencia": None,
-                            "Carrera en UPN": None,
-                            "Modalidad": None,
-                            "Campus": None,
-                            "Plan de Estudios": None,
-                            "Fecha": None,
-                            "Versión ExcelConva": None,
-                            "Total de Créditos": None,
-                            "Observaciones": f"ERROR: {str(ex)}",
-                            "Nombre_PDF": current_name,
-                        }
+                        registrar(idx, current_name, None, ex)
+                        continue
+                    h = _header_cache.get(key)
+                    if h is not None:
+                        registrar(idx, current_name, h, None)
+                    else:
+                        pendientes.append((idx, pdf_path, current_name, key))
+
+                if pendientes and not cancel_flag["stop"]:
+                    # si el pool de procesos se rompe (p. ej. no pudo arrancar sus
+                    # procesos), lo que no llegó a extraer se hace en este hilo
+                    rotos = []
+                    pool = _make_pool(len(pendientes))
+                    try:
+                        futures = {}
+                        for item in pendientes:
+                            try:
+                                futures[pool.submit(extract_conva_header, item[1], nombre_pdf=item[2])] = item
+                            except BrokenProcessPool:
+                                rotos.append(item)
+                        for fut in as_completed(futures):
+                            idx, pdf_path, current_name, key = futures[fut]
+                            try:
+                                h = fut.result()
+                            except BrokenProcessPool:
+                                rotos.append((idx, pdf_path, current_name, key))
+                            except Exception as ex:
+                                registrar(idx, current_name, None, ex)
+                            else:
+                                _header_cache_put(key, h)
+                                registrar(idx, current_name, h, None)
+
+                            if cancel_flag["stop"]:
+                                break
+                    finally:
+                        pool.shutdown(wait=True, cancel_futures=True)
+
+                    for idx, pdf_path, current_name, key in rotos:
+                        if cancel_flag["stop"]:
+                            break
+                        try:
+                            h = extract_conva_header(pdf_path, nombre_pdf=current_name)
+                        except Exception as ex:
+                            registrar(idx, current_name, None, ex)
+                        else:
+                            _header_cache_put(key, h)
+                            registrar(idx, current_name, h, None)
+
+                    save_header_cache(str(CACHE_PATH))
 
+            try:
+                try:
+                    extraer()
+                finally:
+                    # si se canceló, quedan fuera los PDFs que no llegaron a procesarse
                     with lock:
-                        registros.append(row)
-
-                    p = i / total_files
-                    st = f"Procesando... {i}/{total_files} | OK: {ok} | Errores: {errores}"
-                    page.pubsub.send_all({
-                        "type": "progress",
-                        "p": p,
-                        "status": st,
-                        "current": f"PDF actual: {current_name}",
-                    })
+                        registros.extend(h for h in filas if h is not None)
 
                 if cancel_flag["stop"]:
                     final = f"Cancelado 🛑 | Procesados: {len(registros)} | OK: {ok} | Errores: {errores}"
@@ -568,7 +512,7 @@ def main(page: ft.Page):
             controls=[
                 ft.Text("Extractor de Convalidaciones (PDF → Excel)", size=20, weight=ft.FontWeight.BOLD),
                 ft.Text(
-                    "Procesa 1 por 1 y genera un Excel final con más campos extraídos del PDF.",
+                    "Procesa en paralelo y genera un Excel final con más campos extraídos del PDF.",
                     size=12,
                     color=ft.Colors.GREY_700
                 ),
@@ -586,4 +530,9 @@ def main(page: ft.Page):
 
 
 if __name__ == "__main__":
+    # en el .exe congelado los procesos del pool arrancan por aquí
+    multiprocessing.freeze_support()
+    # una vez por arranque, no por cada sesión de Flet
+    load_header_cache(str(CACHE_PATH))
+    atexit.register(save_header_cache, str(CACHE_PATH))
     ft.run(main)
\ No newline at end of file